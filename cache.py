@@ -0,0 +1,71 @@
+"""
+Response Cache Helpers
+
+Redis-backed cache for the read-mostly list endpoints. Entries are keyed by
+"<collection>:v<version>:<params>"; a write bumps the collection's version, so
+older entries are never read again and simply expire. Caching is disabled
+(every lookup misses) when REDIS_URL is not set, and Redis errors or timeouts
+are treated as misses so the API keeps serving from MongoDB.
+"""
+
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+# Load environment variables from .env file
+load_dotenv()
+
+redis = None
+
+redis_url = os.getenv("REDIS_URL")
+cache_ttl = int(os.getenv("CACHE_TTL_SECONDS", 30))
+# Keep an unreachable Redis from stalling requests on the OS connect timeout
+cache_timeout = float(os.getenv("CACHE_TIMEOUT_SECONDS", 0.25))
+
+if redis_url:
+    redis = Redis.from_url(redis_url, socket_connect_timeout=cache_timeout, socket_timeout=cache_timeout)
+
+async def cache_key(collection_name: str, params) -> Optional[str]:
+    """Build the key for a collection's current version, or None when caching is unavailable.
+
+    Resolve the key before querying MongoDB: if a write lands in between, the
+    result is stored under the superseded version and never served.
+    """
+    if redis is None:
+        return None
+    try:
+        version = await redis.get(f"{collection_name}:version")
+    except RedisError:
+        return None
+    return f"{collection_name}:v{int(version or 0)}:{params}"
+
+async def cache_get(key: Optional[str]) -> Optional[bytes]:
+    """Return the cached JSON body for key, or None on a miss"""
+    if redis is None or key is None:
+        return None
+    try:
+        return await redis.get(key)
+    except RedisError:
+        return None
+
+async def cache_set(key: Optional[str], body: bytes):
+    """Store a JSON body for key with the configured TTL"""
+    if redis is None or key is None:
+        return
+    try:
+        await redis.setex(key, cache_ttl, body)
+    except RedisError:
+        pass
+
+async def cache_invalidate(*collection_names: str):
+    """Retire every cached entry for the given collections by bumping their versions"""
+    if redis is None:
+        return
+    try:
+        for name in collection_names:
+            await redis.incr(f"{name}:version")
+    except RedisError:
+        pass
@@ -5,11 +5,11 @@ MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
-from typing import Union
+from typing import List, Union
 from pydantic import BaseModel
 
 # Load environment variables from .env file
@@ -22,34 +22,76 @@ database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
 if database_url and database_name:
-    _client = MongoClient(database_url)
+    # One shared, pre-sized pool for the whole process; connections are reused across requests
+    _client = AsyncIOMotorClient(
+        database_url,
+        maxPoolSize=int(os.getenv("DATABASE_MAX_POOL_SIZE", 50)),
+        minPoolSize=int(os.getenv("DATABASE_MIN_POOL_SIZE", 5)),
+        waitQueueTimeoutMS=int(os.getenv("DATABASE_WAIT_QUEUE_TIMEOUT_MS", 2000)),
+        retryWrites=True,
+    )
     db = _client[database_name]
 
+# Upper bounds for get_documents so no query ships a whole collection
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+
 # Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
-    """Insert a single document with timestamp"""
-    if db is None:
-        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+def _as_stored(value):
+    """Normalize a datetime the way MongoDB stores it: naive UTC with millisecond precision"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    return value
 
+def _prepare_document(data: Union[BaseModel, dict], now: datetime) -> dict:
+    """Convert data to the dict that gets stored: stamp timestamps (keeping a
+    caller-supplied created_at) and normalize datetimes to their stored form, so
+    what create_* returns matches a later read"""
     # Convert Pydantic model to dict if needed
     if isinstance(data, BaseModel):
         data_dict = data.model_dump()
     else:
         data_dict = data.copy()
 
-    data_dict['created_at'] = datetime.now(timezone.utc)
-    data_dict['updated_at'] = datetime.now(timezone.utc)
+    data_dict.setdefault('created_at', now)
+    data_dict['updated_at'] = now
+    return {k: _as_stored(v) for k, v in data_dict.items()}
+
+async def create_document(collection_name: str, data: Union[BaseModel, dict]):
+    """Insert a single document with timestamps and return it, as stored, with its _id"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    data_dict = _prepare_document(data, datetime.now(timezone.utc))
+
+    result = await db[collection_name].insert_one(data_dict)
+    data_dict['_id'] = result.inserted_id
+    return data_dict
+
+async def create_documents(collection_name: str, items: List[Union[BaseModel, dict]]):
+    """Insert many documents with timestamps in a single batch"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    now = datetime.now(timezone.utc)
+    docs = [_prepare_document(data, now) for data in items]
 
-    result = db[collection_name].insert_one(data_dict)
-    return str(result.inserted_id)
+    result = await db[collection_name].insert_many(docs)
+    return [str(_id) for _id in result.inserted_ids]
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
-    """Get documents from collection"""
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = DEFAULT_LIMIT, sort: list = None, projection: dict = None):
+    """Get at most `limit` (clamped to 1..MAX_LIMIT) documents from collection, sorted
+    server-side when a sort spec is given and trimmed to the projected fields when
+    a projection is given"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
     
-    cursor = db[collection_name].find(filter_dict or {})
-    if limit:
-        cursor = cursor.limit(limit)
+    # A plain find() lets the server fuse filter + sort + limit into an index-backed
+    # top-K scan. If this ever needs an aggregation pipeline, keep the same shape:
+    # $match, $sort, $limit first, then any $lookup, and $project last.
+    limit = max(1, min(limit or DEFAULT_LIMIT, MAX_LIMIT))
+    cursor = db[collection_name].find(filter_dict or {}, projection, sort=sort, limit=limit)
     
-    return list(cursor)
+    return await cursor.to_list(length=limit)
@@ -1,12 +1,18 @@
 import os
+import asyncio
+import logging
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import List, Optional, Any, Dict
 
-from fastapi import FastAPI, HTTPException
+import orjson
+from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-from database import db, create_document, get_documents
+from cache import cache_key, cache_get, cache_set, cache_invalidate
+from database import db, create_document, create_documents, get_documents, MAX_LIMIT
 from schemas import (
     Student as StudentSchema,
     Lesson as LessonSchema,
@@ -16,17 +22,67 @@ from schemas import (
     Feedpost as FeedPostSchema,
 )
 
-app = FastAPI(title="School LMS API")
+logger = logging.getLogger(__name__)
+
+
+def _dumps(content: Any) -> bytes:
+    # orjson encodes datetimes natively; default=str covers ObjectId
+    return orjson.dumps(content, default=str)
+
+
+class AppORJSONResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return _dumps(content)
+
+
+app = FastAPI(title="School LMS API", default_response_class=AppORJSONResponse)
+
+# Comma-separated list of allowed origins; "*" (the default) allows any origin without credentials
+CORS_ORIGINS = frozenset(o.strip() for o in os.getenv("CORS_ORIGINS", "*").split(",") if o.strip())
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
+    allow_origins=list(CORS_ORIGINS),
+    allow_credentials="*" not in CORS_ORIGINS,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
 
+@app.on_event("startup")
+async def warm_connection_pool():
+    """Open pool connections up front so the first requests don't pay the handshake."""
+    if db is None:
+        return
+    try:
+        await db.command("ping")
+    except Exception as e:
+        logger.warning("Database ping failed at startup: %s", e)
+
+
+# (collection, keys, create_index options) ensured at startup
+INDEXES = [
+    ("feedpost", [("created_at", -1)], {}),
+    ("lesson", [("date", -1)], {}),
+    ("grade", [("date", -1)], {}),
+    ("assessment", [("due_date", 1)], {}),
+    ("scheduleitem", [("day_index", 1), ("start_time", 1)], {}),
+    ("student", [("email", 1)], {"unique": True}),
+]
+
+
+@app.on_event("startup")
+async def create_indexes():
+    """Back the list endpoints' sort keys with indexes so sort+limit is a top-K scan."""
+    if db is None:
+        return
+    for name, keys, options in INDEXES:
+        try:
+            await db[name].create_index(keys, **options)
+        except Exception as e:
+            logger.warning("Creating index %s on %s failed at startup: %s", keys, name, e)
+
+
 @app.get("/")
 def read_root():
     return {"message": "School LMS API is running"}
@@ -34,6 +90,10 @@ def read_root():
 
 # -------------- Helpers --------------
 
+# Weekday sort position, stored on schedule items as `day_index` so Mongo can sort Mon..Sun
+DAY_ORDER = {"monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6}
+
+@lru_cache(maxsize=None)
 def _collection(name: str):
     if db is None:
         raise HTTPException(status_code=500, detail="Database not configured")
@@ -43,15 +103,60 @@ def _collection(name: str):
 def _serialize(doc: Dict[str, Any]) -> Dict[str, Any]:
     if not doc:
         return doc
-    doc["id"] = str(doc.get("_id"))
-    doc.pop("_id", None)
-    # Convert datetimes to isoformat
-    for k, v in list(doc.items()):
-        if isinstance(v, datetime):
-            doc[k] = v.isoformat()
+    doc["id"] = str(doc.pop("_id", None))
     return doc
 
 
+def _raw_json(body: bytes) -> Response:
+    # Pre-encoded body: bypasses FastAPI's jsonable_encoder walk over the result
+    return Response(content=body, media_type="application/json")
+
+
+def _projection(model: type) -> Dict[str, Any]:
+    """Mongo projection for a schema's fields plus the create_document timestamps,
+    with ``_id`` returned as a string ``id`` (the same shape the POST handlers return)."""
+    projection: Dict[str, Any] = {name: 1 for name in model.model_fields}
+    projection.update(created_at=1, updated_at=1)
+    projection["_id"] = 0
+    projection["id"] = {"$toString": "$_id"}
+    return projection
+
+
+FEED_PROJECTION = _projection(FeedPostSchema)
+SCHEDULE_PROJECTION = _projection(ScheduleItemSchema)
+LESSON_PROJECTION = _projection(LessonSchema)
+GRADE_PROJECTION = _projection(GradeSchema)
+ASSESSMENT_PROJECTION = _projection(AssessmentSchema)
+
+
+def _schedule_doc(item: BaseModel) -> Dict[str, Any]:
+    doc = item.model_dump()
+    doc["day_index"] = DAY_ORDER.get(item.day.lower(), 7)
+    return doc
+
+
+@app.on_event("startup")
+async def backfill_schedule_day_index():
+    """Give schedule items stored before day_index existed their weekday position."""
+    if db is None:
+        return
+    missing = {"day_index": {"$exists": False}}
+    try:
+        if await db["scheduleitem"].find_one(missing, {"_id": 1}) is None:
+            return
+        # Same mapping as _schedule_doc, evaluated server-side in one pipeline update
+        day = {"$toLower": "$day"}
+        day_index = {
+            "$switch": {
+                "branches": [{"case": {"$eq": [day, name]}, "then": index} for name, index in DAY_ORDER.items()],
+                "default": 7,
+            }
+        }
+        await db["scheduleitem"].update_many(missing, [{"$set": {"day_index": day_index}}])
+    except Exception as e:
+        logger.warning("Schedule day_index backfill failed at startup: %s", e)
+
+
 # -------------- Models for requests --------------
 
 class CreateLesson(BaseModel):
@@ -98,98 +203,107 @@ class CreateFeedPost(BaseModel):
 # -------------- Endpoints --------------
 
 @app.get("/api/feed")
-async def list_feed(limit: int = 20):
-    docs = get_documents("feedpost", {}, limit)
-    docs = sorted(docs, key=lambda d: d.get("created_at", datetime.min), reverse=True)
-    return [_serialize(d) for d in docs]
+async def list_feed(limit: int = Query(20, ge=1, le=MAX_LIMIT)):
+    key = await cache_key("feedpost", limit)
+    if (cached := await cache_get(key)) is not None:
+        return _raw_json(cached)
+    docs = await get_documents("feedpost", {}, limit, sort=[("created_at", -1)], projection=FEED_PROJECTION)
+    body = _dumps(docs)
+    await cache_set(key, body)
+    return _raw_json(body)
 
 
 @app.post("/api/feed")
 async def create_feed(item: CreateFeedPost):
-    data = FeedPostSchema(
-        author_name=item.author_name,
-        author_avatar=item.author_avatar,
-        text=item.text,
-        image_url=item.image_url,
-        created_at=datetime.utcnow(),
-        likes=0,
-        comments_count=0,
-    )
-    inserted_id = create_document("feedpost", data)
-    doc = _collection("feedpost").find_one({"_id": __import__("bson").ObjectId(inserted_id)})
+    data = item.model_dump()
+    data.update(likes=0, comments_count=0)
+    doc = await create_document("feedpost", data)
+    await cache_invalidate("feedpost")
     return _serialize(doc)
 
 
 @app.get("/api/schedule")
-async def list_schedule():
-    docs = get_documents("scheduleitem", {})
-    # Keep a stable order: Mon..Sun by custom order map + start_time
-    order = {"monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6}
-    docs = sorted(
-        docs,
-        key=lambda d: (
-            order.get(str(d.get("day", "")).lower(), 7),
-            str(d.get("start_time", ""))
-        ),
+async def list_schedule(limit: int = Query(200, ge=1, le=MAX_LIMIT)):
+    key = await cache_key("scheduleitem", limit)
+    if (cached := await cache_get(key)) is not None:
+        return _raw_json(cached)
+    # Keep a stable order: Mon..Sun by stored day_index + start_time
+    docs = await get_documents(
+        "scheduleitem", {}, limit, sort=[("day_index", 1), ("start_time", 1)], projection=SCHEDULE_PROJECTION
     )
-    return [_serialize(d) for d in docs]
+    body = _dumps(docs)
+    await cache_set(key, body)
+    return _raw_json(body)
 
 
 @app.post("/api/schedule")
 async def create_schedule(item: CreateScheduleItem):
-    data = ScheduleItemSchema(**item.model_dump())
-    inserted_id = create_document("scheduleitem", data)
-    doc = _collection("scheduleitem").find_one({"_id": __import__("bson").ObjectId(inserted_id)})
+    data = _schedule_doc(item)
+    doc = await create_document("scheduleitem", data)
+    await cache_invalidate("scheduleitem")
+    doc.pop("day_index", None)
     return _serialize(doc)
 
 
 @app.get("/api/lessons")
-async def list_lessons(limit: int = 50):
-    docs = get_documents("lesson", {}, limit)
-    docs = sorted(docs, key=lambda d: d.get("date", datetime.min), reverse=True)
-    return [_serialize(d) for d in docs]
+async def list_lessons(limit: int = Query(50, ge=1, le=MAX_LIMIT)):
+    key = await cache_key("lesson", limit)
+    if (cached := await cache_get(key)) is not None:
+        return _raw_json(cached)
+    docs = await get_documents("lesson", {}, limit, sort=[("date", -1)], projection=LESSON_PROJECTION)
+    body = _dumps(docs)
+    await cache_set(key, body)
+    return _raw_json(body)
 
 
 @app.post("/api/lessons")
 async def create_lesson(item: CreateLesson):
-    data = LessonSchema(**item.model_dump())
-    inserted_id = create_document("lesson", data)
-    doc = _collection("lesson").find_one({"_id": __import__("bson").ObjectId(inserted_id)})
+    data = item.model_dump()
+    doc = await create_document("lesson", data)
+    await cache_invalidate("lesson")
     return _serialize(doc)
 
 
 @app.get("/api/grades")
-async def list_grades(limit: int = 100):
-    docs = get_documents("grade", {}, limit)
-    docs = sorted(docs, key=lambda d: d.get("date", datetime.min), reverse=True)
-    return [_serialize(d) for d in docs]
+async def list_grades(limit: int = Query(100, ge=1, le=MAX_LIMIT)):
+    key = await cache_key("grade", limit)
+    if (cached := await cache_get(key)) is not None:
+        return _raw_json(cached)
+    docs = await get_documents("grade", {}, limit, sort=[("date", -1)], projection=GRADE_PROJECTION)
+    body = _dumps(docs)
+    await cache_set(key, body)
+    return _raw_json(body)
 
 
 @app.post("/api/grades")
 async def create_grade(item: CreateGrade):
-    data = GradeSchema(**item.model_dump())
-    inserted_id = create_document("grade", data)
-    doc = _collection("grade").find_one({"_id": __import__("bson").ObjectId(inserted_id)})
+    data = item.model_dump()
+    doc = await create_document("grade", data)
+    await cache_invalidate("grade")
     return _serialize(doc)
 
 
 @app.get("/api/assessments")
-async def list_assessments(limit: int = 50):
-    docs = get_documents("assessment", {}, limit)
-    docs = sorted(docs, key=lambda d: d.get("due_date", datetime.min))
-    return [_serialize(d) for d in docs]
+async def list_assessments(limit: int = Query(50, ge=1, le=MAX_LIMIT)):
+    key = await cache_key("assessment", limit)
+    if (cached := await cache_get(key)) is not None:
+        return _raw_json(cached)
+    docs = await get_documents("assessment", {}, limit, sort=[("due_date", 1)], projection=ASSESSMENT_PROJECTION)
+    body = _dumps(docs)
+    await cache_set(key, body)
+    return _raw_json(body)
 
 
 @app.post("/api/assessments")
 async def create_assessment(item: CreateAssessment):
-    data = AssessmentSchema(**item.model_dump())
-    inserted_id = create_document("assessment", data)
-    doc = _collection("assessment").find_one({"_id": __import__("bson").ObjectId(inserted_id)})
+    data = item.model_dump()
+    doc = await create_document("assessment", data)
+    await cache_invalidate("assessment")
     return _serialize(doc)
 
 
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -205,7 +319,7 @@ def test_database():
             response["database_name"] = getattr(db, "name", "✅ Connected")
             response["connection_status"] = "Connected"
             try:
-                collections = db.list_collection_names()
+                collections = await db.list_collection_names()
                 response["collections"] = collections[:10]
                 response["database"] = "✅ Connected & Working"
             except Exception as e:
@@ -228,7 +342,7 @@ async def seed_demo_data():
         raise HTTPException(status_code=500, detail="Database not configured")
 
     # Avoid duplicate seeding
-    if _collection("feedpost").count_documents({}) > 0:
+    if await _collection("feedpost").estimated_document_count() > 0:
         return {"status": "ok", "message": "Already seeded"}
 
     now = datetime.utcnow()
@@ -239,8 +353,6 @@ async def seed_demo_data():
         FeedPostSchema(author_name="Sports Dept.", text="Tryouts start Monday. Go Blue Hawks!", image_url=None, created_at=now - timedelta(days=1), likes=48, comments_count=9),
         FeedPostSchema(author_name="Science Club", text="Lab safety workshop tomorrow.", image_url=None, created_at=now - timedelta(days=2), likes=20, comments_count=4),
     ]
-    for p in posts:
-        create_document("feedpost", p)
 
     # Schedule (Mon-Fri)
     schedule = [
@@ -251,32 +363,35 @@ async def seed_demo_data():
         ScheduleItemSchema(day="Thursday", start_time="13:00", end_time="13:50", subject="Physics", room="Lab 1"),
         ScheduleItemSchema(day="Friday", start_time="14:00", end_time="14:50", subject="Art", room="D110"),
     ]
-    for s in schedule:
-        create_document("scheduleitem", s)
 
     # Lessons
     lessons = [
         LessonSchema(title="Quadratic Functions", subject="Math", teacher="Mr. Lee", description="Parabolas and vertex form", date=now - timedelta(days=1), resources=["slides.pdf", "practice.docx"]),
         LessonSchema(title="Poetry Analysis", subject="English", teacher="Ms. Carter", description="Figurative language", date=now - timedelta(days=2), resources=["poems.pdf"]),
     ]
-    for l in lessons:
-        create_document("lesson", l)
 
     # Grades
     grades = [
         GradeSchema(subject="Math", assignment="Algebra Quiz", score=18, total=20, letter="A", date=now - timedelta(days=3)),
         GradeSchema(subject="English", assignment="Essay Draft", score=45, total=50, letter="A-", date=now - timedelta(days=4)),
     ]
-    for g in grades:
-        create_document("grade", g)
 
     # Assessments
     assessments = [
         AssessmentSchema(title="Chemistry Lab Report", subject="Chemistry", type="Project", due_date=now + timedelta(days=2), status="upcoming"),
         AssessmentSchema(title="Physics Midterm", subject="Physics", type="Exam", due_date=now + timedelta(days=10), status="upcoming"),
     ]
-    for a in assessments:
-        create_document("assessment", a)
+
+    # Collections are independent, so write them concurrently
+    await asyncio.gather(
+        create_documents("feedpost", posts),
+        create_documents("scheduleitem", [_schedule_doc(s) for s in schedule]),
+        create_documents("lesson", lessons),
+        create_documents("grade", grades),
+        create_documents("assessment", assessments),
+    )
+
+    await cache_invalidate("feedpost", "scheduleitem", "lesson", "grade", "assessment")
 
     return {"status": "ok", "message": "Seeded demo content"}
 
@@ -284,4 +399,10 @@ async def seed_demo_data():
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 2)),
+        access_log=False,
+    )